@@ -1,9 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+import io
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from uuid import UUID
 from api.utils import get_current_user
-from models.models import User, UserRole
+from models.models import User, UserRole, ModerationStatus
 from db import get_session
+from core.bulk import export_posts, import_posts
+from core.scheduler import scheduler
+from core.startup_profile import startup_profile
+from core.stats import get_stats
+from core.view_counter import view_counter
 
 router = APIRouter()
 
@@ -32,4 +42,78 @@ def change_moder_role(user_id: UUID, current_user: User = Depends(get_current_us
     session.add(target_user)
     session.commit()
 
-    return {"msg": f"Пользователь {target_user.username} теперь {'модератор' if target_user.role == UserRole.MODERATOR else 'не модератор'}"}
\ No newline at end of file
+    return {"msg": f"Пользователь {target_user.username} теперь {'модератор' if target_user.role == UserRole.MODERATOR else 'не модератор'}"}
+
+
+@router.get("/jobs/[.get]")
+def get_jobs(current_user: User = Depends(get_current_user)):
+    """Метрики фоновых задач этого воркера"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
+
+    return {"is_leader": scheduler.is_leader, "jobs": scheduler.stats(), "view_counter": view_counter.stats()}
+
+
+
+@router.get("/startup/[.get]")
+def get_startup_profile(current_user: User = Depends(get_current_user)):
+    """Время запуска этого воркера по этапам"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
+
+    return startup_profile.report()
+
+
+
+@router.post("/posts/import/[.post]")
+async def bulk_import_posts(
+    request: Request,
+    format: str = Query("jsonl", pattern="^(jsonl|csv)$"),
+    current_user: User = Depends(get_current_user),
+):
+    """Массовый импорт постов из тела запроса (JSONL или CSV) в очередь модерации"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
+
+    # Тело читается потоком и при большом размере уходит на диск, а не в память
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        # newline="": строки делятся только по \n/\r, как того требуют JSONL и модуль csv
+        stream = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        report = await run_in_threadpool(import_posts, stream, format, current_user)
+        stream.detach()
+    return report.as_dict()
+
+
+@router.get("/posts/export/[.get]")
+def bulk_export_posts(
+    format: str = Query("jsonl", pattern="^(jsonl|csv)$"),
+    status: Optional[ModerationStatus] = Query(None),
+    current_user: User = Depends(get_current_user),
+):
+    """Выгрузить посты потоком в JSONL или CSV"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_posts(format, status),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=posts.{format}"},
+    )
+
+
+
+@router.get("/stats/[.get]")
+def get_post_stats(
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Статистика постов по статусам, городам и дням и задержка модерации"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
+
+    return get_stats(session, days)
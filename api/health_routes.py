@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlmodel import Session
+
+from core.health import worker_state
+from db import engine
+
+router = APIRouter()
+
+@router.get("")
+def liveness():
+    """Воркер жив и обрабатывает запросы"""
+    return {
+        "status": "ok",
+        "pid": worker_state.pid,
+        "started_at": worker_state.started_at,
+        "uptime_seconds": round(worker_state.uptime_seconds, 1),
+    }
+
+@router.get("/ready")
+def readiness():
+    """Воркер запущен, не останавливается и видит БД. Иначе 503, и балансировщик уводит трафик"""
+    if not worker_state.ready:
+        status = "draining" if worker_state.draining else "starting"
+        return JSONResponse(status_code=503, content={"status": status, "pid": worker_state.pid})
+
+    try:
+        with Session(engine) as session:
+            session.execute(text("SELECT 1"))
+    except Exception as e:
+        # Текст ошибки может содержать адрес и пользователя БД, поэтому наружу его не отдаём
+        print(f"⚠️ Проверка готовности: БД недоступна: {e}")
+        return JSONResponse(status_code=503, content={"status": "db_unavailable", "pid": worker_state.pid})
+
+    return {"status": "ready", "pid": worker_state.pid}
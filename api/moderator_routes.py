@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from fastapi import APIRouter, HTTPException, Depends
 from sqlmodel import Session, select
 from typing import List
@@ -6,6 +8,8 @@ from api.utils import get_current_user
 from models.models import User, UserRole, Post, ModerationStatus, RejectBody
 from schemas.post import PostResponse
 from db import get_session
+from core.post_cache import post_cache
+from core.stats import apply_counter_deltas, post_counter_keys
 
 router = APIRouter()
 
@@ -15,7 +19,7 @@ def get_pending_posts(current_user: User = Depends(get_current_user), session: S
     if current_user.role != UserRole.ADMIN and current_user.role != UserRole.MODERATOR:
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
-    stmt = select(Post).where(Post.moderation_status == ModerationStatus.PENDING).order_by(Post.created_at.desc())
+    stmt = select(Post).where(Post.moderation_status == ModerationStatus.PENDING, Post.deleted_at.is_(None)).order_by(Post.created_at.desc())
     posts = session.exec(stmt).all()
     return posts
 
@@ -27,13 +31,17 @@ def approve_post(post_id: UUID, current_user: User = Depends(get_current_user),
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
     post = session.get(Post, post_id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
+    counters_before = post_counter_keys(post)
     post.moderation_status = ModerationStatus.APPROVED
     post.rejection_reason = None
+    post.moderated_at = datetime.now()
     session.add(post)
+    apply_counter_deltas(session, counters_before, post_counter_keys(post))
     session.commit()
+    post_cache.invalidate(post_id)
     session.refresh(post)
 
     return post
@@ -46,13 +54,17 @@ def reject_post(post_id: UUID, reject_body: RejectBody, current_user: User = Dep
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
     post = session.get(Post, post_id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
+    counters_before = post_counter_keys(post)
     post.moderation_status = ModerationStatus.REJECTED
     post.rejection_reason = reject_body.reason
+    post.moderated_at = datetime.now()
     session.add(post)
+    apply_counter_deltas(session, counters_before, post_counter_keys(post))
     session.commit()
+    post_cache.invalidate(post_id)
     session.refresh(post)
 
     return post
@@ -70,7 +82,7 @@ def list_users(current_user: User = Depends(get_current_user), session: Session
 
 @router.post("/users/:id/[.post]")
 def change_ban_status(user_id: UUID, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    """Разбанить пользователя или забанить и удалить все его посты."""
+    """Разбанить пользователя или забанить и удалить все его посты (файлы удаляет фоновая очистка)."""
     if current_user.role != UserRole.ADMIN and current_user.role != UserRole.MODERATOR:
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
@@ -84,9 +96,13 @@ def change_ban_status(user_id: UUID, current_user: User = Depends(get_current_us
     if user.role != UserRole.USER:
         raise HTTPException(status_code=400, detail="Можно разбанивать только пользователей")
 
-    user_posts = session.exec(select(Post).where(Post.user_id == user_id)).all()
+    now = datetime.now()
+    user_posts = session.exec(select(Post).where(Post.user_id == user_id, Post.deleted_at.is_(None))).all()
+    deleted_post_ids = [post.id for post in user_posts]
+    apply_counter_deltas(session, [key for post in user_posts for key in post_counter_keys(post)], [])
     for post in user_posts:
-        session.delete(post)
+        post.deleted_at = now
+        session.add(post)
 
     if not user.is_banned:
         user.is_banned = True
@@ -96,6 +112,8 @@ def change_ban_status(user_id: UUID, current_user: User = Depends(get_current_us
 
     session.add(user)
     session.commit()
+    for deleted_post_id in deleted_post_ids:
+        post_cache.invalidate(deleted_post_id)
     session.refresh(user)
 
     return {"msg": f"Пользователь {user.username} {'забанен' if user.is_banned == True else 'разбанен'}.","username": user.username,"user_id": user.id,"email": user.email,}
\ No newline at end of file
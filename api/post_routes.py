@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
 from sqlalchemy import func, desc
 from sqlalchemy.orm import selectinload
@@ -5,10 +7,14 @@ from sqlmodel import Session, select
 from typing import List, Optional
 from uuid import UUID
 from api.utils import get_current_user, get_optional_user
-from models.models import User, UserRole, Post, ModerationStatus, PostImage
+from models.models import User, UserRole, Post, ModerationStatus, PostImage, PostViewCount
 from schemas.post import PostResponse
-from db import get_session
-from core.upload_config import delete_file_from_s3, upload_file_to_s3
+from db import engine, get_session
+from core.post_cache import post_cache
+from core.stats import apply_counter_deltas, post_counter_keys
+from core.image_store import release_images, store_image
+from core.upload_validation import validate_images
+from core.view_counter import view_counter
 
 router = APIRouter()
 
@@ -31,6 +37,8 @@ def create_post(
     if images and len(images) > 10:
         raise HTTPException(status_code=400, detail="Можно загрузить максимум 10 изображений")
 
+    content_types = validate_images(images) if images else []
+
     post = Post(
         title=title,
         content=content,
@@ -42,12 +50,13 @@ def create_post(
         username=current_user.username
     )
     session.add(post)
+    apply_counter_deltas(session, [], post_counter_keys(post))
     session.commit()
     session.refresh(post)
 
     if images:
-        for file in images:
-            url = upload_file_to_s3(file)
+        for file, content_type in zip(images, content_types):
+            url = store_image(session, file, content_type)
             post_image = PostImage(post_id=post.id, image_url=url)
             session.add(post_image)
         session.commit()
@@ -56,34 +65,54 @@ def create_post(
     post.images = session.exec(select(PostImage).where(PostImage.post_id == post.id)).all()
     return post
 
+def _order_by_views(stmt):
+    return stmt.outerjoin(PostViewCount, PostViewCount.post_id == Post.id).order_by(
+        desc(func.coalesce(PostViewCount.views, 0))
+    )
+
 @router.get("/[.get]", response_model=List[PostResponse])
-def get_all_posts(session: Session = Depends(get_session)):
+def get_all_posts(
+    sort: str = Query("date", pattern="^(date|views)$", description="Сортировка: date — новые сначала, views — по просмотрам"),
+    session: Session = Depends(get_session),
+):
     """Получить все одобренные посты"""
-    stmt = select(Post).where(Post.moderation_status == ModerationStatus.APPROVED).order_by(Post.created_at.desc())
-    posts = session.exec(stmt).all()
+    stmt = select(Post).where(Post.moderation_status == ModerationStatus.APPROVED, Post.deleted_at.is_(None))
+    if sort == "views":
+        stmt = _order_by_views(stmt)
+    posts = session.exec(stmt.order_by(Post.created_at.desc())).all()
     for post in posts:
         post.images = session.exec(select(PostImage).where(PostImage.post_id == post.id)).all()
     return posts
 
+def _load_post(post_id: UUID) -> Optional[PostResponse]:
+    """Загрузить пост с изображениями в отдельной сессии (результат разделяют конкурентные запросы)"""
+    with Session(engine) as db_session:
+        post = db_session.get(Post, post_id)
+        if not post or post.deleted_at is not None:
+            return None
+        post.images = db_session.exec(select(PostImage).where(PostImage.post_id == post.id)).all()
+        return PostResponse.model_validate(post)
+
 @router.get("/:id/[.get]", response_model=PostResponse)
-def get_post(post_id: UUID, current_user: Optional[User] = Depends(get_optional_user), session: Session = Depends(get_session)):
+def get_post(post_id: UUID, current_user: Optional[User] = Depends(get_optional_user)):
     """Получить пост по ID"""
-    post = session.get(Post, post_id)
+    post = post_cache.get_or_load(post_id, lambda: _load_post(post_id))
     if not post:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
-    post.images = session.exec(select(PostImage).where(PostImage.post_id == post.id)).all()
-    
+    if post.moderation_status == ModerationStatus.APPROVED:
+        # Просмотры владельца не считаем
+        if not current_user or current_user.id != post.user_id:
+            view_counter.record(post_id)
+        return post
+
     if current_user and current_user.role == UserRole.ADMIN:
         return post
     
     if current_user and post.user_id == current_user.id:
         return post
     
-    if post.moderation_status != ModerationStatus.APPROVED:
-        raise HTTPException(status_code=404, detail="Пост не найден")
-    
-    return post
+    raise HTTPException(status_code=404, detail="Пост не найден")
 
 @router.put("/:id/[.put]", response_model=PostResponse)
 def update_post(
@@ -101,12 +130,14 @@ def update_post(
 ):
     """Редактировать пост по ID. Можно заменить все изображения или добавить новые (до 10 в сумме)."""
     post = session.get(Post, post_id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
     if post.user_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
+    counters_before = post_counter_keys(post)
+
     # Обновляем текстовые поля, если переданы
     if title is not None:
         post.title = title
@@ -122,6 +153,8 @@ def update_post(
         post.price = price
 
     post.moderation_status = ModerationStatus.PENDING
+    post.submitted_at = datetime.now()
+    post.moderated_at = None
 
     # Если переданы файлы, либо заменяем, либо добавляем
     if images is not None:
@@ -140,47 +173,49 @@ def update_post(
                 detail=f"Можно максимум 10 изображений. Сейчас {remaining}, новых {len(images)}"
             )
 
-        for image in to_delete:
-            delete_file_from_s3(image.image_url)
-            session.delete(image)
+        content_types = validate_images(images)
 
-        # Загружаем новые изображения
-        for file in images:
-            url = upload_file_to_s3(file)
+        # Сначала загружаем новые изображения: одинаковые файлы при повторной отправке не перезагружаются
+        for file, content_type in zip(images, content_types):
+            url = store_image(session, file, content_type)
             session.add(PostImage(post_id=post.id, image_url=url))
 
+        release_images(session, [image.image_url for image in to_delete])
+        for image in to_delete:
+            session.delete(image)
+
     session.add(post)
+    apply_counter_deltas(session, counters_before, post_counter_keys(post))
     session.commit()
+    post_cache.invalidate(post_id)
     session.refresh(post)
     post.images = session.exec(select(PostImage).where(PostImage.post_id == post.id)).all()
     return post
 
 @router.delete("/:id/[.delete]", status_code=204)
 def delete_post(post_id: UUID, current_user: Optional[User] = Depends(get_current_user), session: Session = Depends(get_session)):
-    """Удалить пост по ID и все связанные изображения"""
+    """Удалить пост по ID. Пост сразу скрывается, строки и файлы в хранилище удаляет фоновая очистка"""
     post = session.get(Post, post_id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
     if post.user_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
-    images = session.exec(select(PostImage).where(PostImage.post_id == post.id)).all()
-
-    for image in images:
-        delete_file_from_s3(image.image_url)
-
-    session.delete(post)
+    counters_before = post_counter_keys(post)
+    post.deleted_at = datetime.now()
+    session.add(post)
+    apply_counter_deltas(session, counters_before, [])
     session.commit()
-    return post
+    post_cache.invalidate(post_id)
 
 @router.get("/:user_id/[.get]", response_model=List[PostResponse])
 def get_user_posts(user_id: UUID, current_user: Optional[User] = Depends(get_optional_user), session: Session = Depends(get_session)):
     """Получить посты пользователя"""
     if current_user and (current_user.role == UserRole.ADMIN or current_user.id == user_id):
-        stmt = select(Post).where(Post.user_id == user_id).order_by(Post.created_at.desc())
+        stmt = select(Post).where(Post.user_id == user_id, Post.deleted_at.is_(None)).order_by(Post.created_at.desc())
     else:
-        stmt = select(Post).where(Post.user_id == user_id, Post.moderation_status == ModerationStatus.APPROVED).order_by(Post.created_at.desc())
+        stmt = select(Post).where(Post.user_id == user_id, Post.moderation_status == ModerationStatus.APPROVED, Post.deleted_at.is_(None)).order_by(Post.created_at.desc())
     
     posts = session.exec(stmt).all()
     for post in posts:
@@ -192,6 +227,7 @@ def search_posts(
     query: str = Query(..., min_length=1, max_length=200, description="Строка поиска"),
     limit: int = Query(20, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    sort: str = Query("relevance", pattern="^(relevance|views)$", description="Сортировка: relevance — по релевантности, views — по просмотрам"),
     session: Session = Depends(get_session)
 ):
     """Полнотекстовый поиск по одобренным постам"""
@@ -201,10 +237,11 @@ def search_posts(
         .options(selectinload(Post.images))
         .where(
             Post.moderation_status == ModerationStatus.APPROVED,
+            Post.deleted_at.is_(None),
             Post.search_vector.op('@@')(ts_query),
         )
-        .order_by(desc(func.ts_rank_cd(Post.search_vector, ts_query)))
-        .limit(limit)
-        .offset(offset)
     )
+    if sort == "views":
+        stmt = _order_by_views(stmt)
+    stmt = stmt.order_by(desc(func.ts_rank_cd(Post.search_vector, ts_query))).limit(limit).offset(offset)
     return session.exec(stmt).all()
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlmodel import Session
 from api.utils import get_current_user
-from core.upload_config import upload_file_to_s3
+from core.image_store import store_image
+from core.upload_validation import validate_images
 from models.models import User, UserRole
 from db import get_session
 
@@ -13,5 +14,8 @@ def upload_image(current_user: User = Depends(get_current_user), session: Sessio
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостаточно прав доступа")
 
-    url = upload_file_to_s3(file)
+    content_type, = validate_images([file])
+    # Ссылка из админской загрузки нигде не освобождается, поэтому объект не будет удалён
+    url = store_image(session, file, content_type)
+    session.commit()
     return {"url": url}
\ No newline at end of file
@@ -71,7 +71,7 @@ def get_me(current_user: User = Depends(get_current_user), session: Session = De
         can_change_username = True
 
     # Получаем все посты пользователя
-    stmt = select(Post).where(Post.user_id == current_user.id).order_by(Post.created_at.desc())
+    stmt = select(Post).where(Post.user_id == current_user.id, Post.deleted_at.is_(None)).order_by(Post.created_at.desc())
     posts = session.exec(stmt).all()
     
     # Загружаем изображения для каждого поста
@@ -0,0 +1,110 @@
+"""
+Сборка фронтенда для продакшена: python -m core.asset_build
+
+Начиная с index.html собирает файлы, на которые есть ссылки, добавляет к их именам
+хэш содержимого, переписывает ссылки и заранее сжимает всё в gzip и brotli.
+Отладочные и тестовые страницы не попадают в сборку, потому что на них никто не ссылается.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него собираются только gzip-варианты
+    brotli = None
+
+SOURCE_DIR = "JS"
+DIST_DIR = os.path.join(SOURCE_DIR, "dist")
+ENTRY = "index.html"
+MANIFEST = "manifest.json"
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".css", ".json", ".svg", ".txt"}
+# Не сжимаем совсем маленькие файлы: заголовки съедят выигрыш
+MIN_COMPRESS_BYTES = 256
+
+# Относительные ссылки вида ./file.ext в HTML-атрибутах, ES-импортах и url() в CSS
+REFERENCE_PATTERNS = {
+    ".html": re.compile(r'''((?:src|href)=["'])\./([^"'?#]+)(["'])'''),
+    ".js": re.compile(r'''((?:from|import)\s*\(?\s*["'])\./([^"'?#]+)(["'])'''),
+    ".css": re.compile(r'''(url\(\s*["']?)\./([^"')?#]+)(["']?\s*\))'''),
+}
+
+
+def _fingerprint(name: str, content: bytes) -> str:
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{extension}"
+
+
+def _compress(path: str, content: bytes):
+    if os.path.splitext(path)[1] not in COMPRESSIBLE_EXTENSIONS or len(content) < MIN_COMPRESS_BYTES:
+        return
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(content, quality=11))
+
+
+class _Builder:
+    def __init__(self, source_dir: str, dist_dir: str):
+        self.source_dir = source_dir
+        self.dist_dir = dist_dir
+        self.manifest: Dict[str, str] = {}
+        self._in_progress = set()
+
+    def build_file(self, name: str) -> str:
+        """Собрать файл и его зависимости, вернуть имя файла в сборке."""
+        if name in self.manifest:
+            return self.manifest[name]
+        if name in self._in_progress:
+            raise ValueError(f"Циклическая ссылка на {name}")
+        self._in_progress.add(name)
+
+        with open(os.path.join(self.source_dir, name), "rb") as f:
+            content = f.read()
+
+        pattern = REFERENCE_PATTERNS.get(os.path.splitext(name)[1])
+        if pattern is not None:
+            text = content.decode("utf-8")
+            base = os.path.dirname(name)
+            text = pattern.sub(
+                lambda m: f"{m.group(1)}./{os.path.relpath(self.build_file(os.path.normpath(os.path.join(base, m.group(2)))), base or '.')}{m.group(3)}",
+                text,
+            )
+            content = text.encode("utf-8")
+
+        # Точку входа не переименовываем: её адрес должен оставаться постоянным
+        output_name = name if name == ENTRY else _fingerprint(name, content)
+        output_path = os.path.join(self.dist_dir, output_name)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(content)
+        _compress(output_path, content)
+
+        self._in_progress.discard(name)
+        self.manifest[name] = output_name
+        return output_name
+
+
+def build_assets(source_dir: str = SOURCE_DIR, dist_dir: str = DIST_DIR) -> Dict[str, str]:
+    """Пересобрать dist_dir и вернуть манифест: исходное имя -> имя в сборке."""
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+
+    builder = _Builder(source_dir, dist_dir)
+    builder.build_file(ENTRY)
+    with open(os.path.join(dist_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(builder.manifest, f, ensure_ascii=False, indent=2)
+    return builder.manifest
+
+
+if __name__ == "__main__":
+    manifest = build_assets()
+    for source, output in manifest.items():
+        print(f"{source} -> {output}")
+    if brotli is None:
+        print("⚠️ Модуль brotli не установлен, собраны только gzip-варианты")
@@ -0,0 +1,315 @@
+"""
+Массовый импорт и экспорт постов в JSONL и CSV.
+
+Импорт читает файл построчно, проверяет строки партиями по схеме PostResponse и вставляет
+корректные строки через COPY. Все импортированные посты попадают в очередь модерации,
+ошибки в данных собираются по номерам строк и не прерывают импорт (в отличие от ошибок
+соединения с БД). Экспорт отдаёт посты
+постраничной выборкой по id, поэтому память не зависит от размера базы.
+
+CLI:
+    python -m core.bulk import posts.jsonl --owner-email admin@example.com
+    python -m core.bulk export --format csv --status approved > posts.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import psycopg2
+from pydantic import ValidationError
+from sqlalchemy import exc
+from sqlmodel import Session, select
+
+from core.config import settings
+from core.stats import apply_counter_deltas, counter_keys
+from core.upload_config import is_stored_url, key_from_url, public_url
+from db import engine
+from models.models import ModerationStatus, Post, PostImage, User
+from schemas.post import PostResponse
+
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = [
+    "id", "title", "content", "contact", "city", "street", "price", "created_at",
+    "user_id", "username", "moderation_status", "rejection_reason", "views", "images",
+]
+POST_COPY_COLUMNS = [
+    "id", "title", "content", "contact", "city", "street", "price", "created_at",
+    "user_id", "username", "moderation_status", "rejection_reason", "submitted_at",
+]
+IMAGE_COPY_COLUMNS = ["id", "post_id", "image_url", "created_at"]
+# Сколько ошибок хранить в отчёте; остальные только считаются
+MAX_REPORTED_ERRORS = 1000
+# Ошибки из-за данных отдельных строк: партия с ними делится пополам. Остальные ошибки
+# (недоступная БД, обрыв соединения) прерывают импорт
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError, exc.DataError, exc.IntegrityError)
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+
+def _read_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Построчно читать файл; в CSV изображения перечисляются через пробел в колонке images."""
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), start=2):
+            row = {key: (value if value != "" else None) for key, value in row.items() if key}
+            row["images"] = (row.get("images") or "").split()
+            yield row_number, row
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, e
+
+
+def _to_post(row: object, owner: User, now: datetime) -> PostResponse:
+    """Собрать пост из строки импорта и проверить его по схеме ответа API."""
+    if isinstance(row, Exception):
+        raise ValueError(f"Некорректный JSON: {row}")
+    if not isinstance(row, dict):
+        raise ValueError("Строка должна быть объектом")
+
+    images = row.get("images") or []
+    if not isinstance(images, list) or len(images) > 10:
+        raise ValueError("images должен быть списком не длиннее 10 ссылок")
+    # JSONL-экспорт пишет изображения объектами, поэтому принимаем и объекты, и ссылки
+    images = [image.get("image_url") if isinstance(image, dict) else image for image in images]
+
+    # Postgres не хранит символ NUL в тексте: такая строка прошла бы схему, но сломала бы COPY
+    for field in ("title", "content", "contact", "city", "street", "price"):
+        value = row.get(field)
+        if isinstance(value, str) and "\x00" in value:
+            raise ValueError(f"Поле {field} содержит символ NUL")
+
+    post_id = uuid.uuid4()
+    return PostResponse.model_validate({
+        "id": post_id,
+        "title": row.get("title"),
+        "content": row.get("content"),
+        "contact": row.get("contact"),
+        "city": row.get("city"),
+        "street": row.get("street"),
+        "price": None if row.get("price") is None else str(row.get("price")),
+        "created_at": now,
+        "user_id": owner.id,
+        "username": owner.username,
+        # Импорт всегда идёт через модерацию, статус из файла игнорируется
+        "moderation_status": ModerationStatus.PENDING,
+        "images": [
+            {"id": uuid.uuid4(), "image_url": image_url, "created_at": now}
+            for image_url in images
+        ],
+    })
+
+
+def _copy_value(value) -> str:
+    # В CSV-формате COPY пустое значение без кавычек означает NULL, поэтому строки всегда в кавычках
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_buffer(rows: Iterable[list]) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_batch(posts: List[PostResponse]):
+    post_rows = (
+        [post.id, post.title, post.content, post.contact, post.city, post.street, post.price,
+         post.created_at.isoformat(), post.user_id, post.username,
+         ModerationStatus(post.moderation_status).name, None, post.created_at.isoformat()]
+        for post in posts
+    )
+    image_rows = (
+        [image.id, post.id, image.image_url, image.created_at.isoformat()]
+        for post in posts
+        for image in post.images
+    )
+    with engine.begin() as connection:
+        # COPY выполняется через курсор драйвера в той же транзакции, что и счётчики
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY post ({', '.join(POST_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", _copy_buffer(post_rows)
+            )
+            cursor.copy_expert(
+                f"COPY postimage ({', '.join(IMAGE_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", _copy_buffer(image_rows)
+            )
+            # Ссылки на файлы из нашего хранилища учитываем в счётчиках, иначе удаление
+            # импортированного поста освободило бы чужую ссылку
+            stored_keys = Counter(
+                key_from_url(image.image_url)
+                for post in posts
+                for image in post.images
+                if is_stored_url(image.image_url)
+            )
+            # У объектов, загруженных до подсчёта ссылок, строки StoredFile нет: заводим её со счётчиком,
+            # равным числу всех ссылающихся изображений (уже включая импортированные)
+            for key, count in stored_keys.items():
+                cursor.execute(
+                    "INSERT INTO storedfile (key, ref_count, created_at) "
+                    "VALUES (%s, (SELECT count(*) FROM postimage WHERE image_url = %s), now()) "
+                    "ON CONFLICT (key) DO UPDATE SET ref_count = storedfile.ref_count + %s",
+                    (key, public_url(key), count),
+                )
+        finally:
+            cursor.close()
+
+        apply_counter_deltas(
+            connection,
+            [],
+            [key for post in posts for key in counter_keys(post.moderation_status, post.city, post.created_at)],
+        )
+
+
+def import_posts(stream: IO[str], fmt: str, owner: User, batch_size: int = settings.BULK_BATCH_SIZE) -> ImportReport:
+    """
+    Импортировать посты из потока. Если партия не вставилась из-за данных, она делится
+    пополам до строк с ошибкой; ошибки соединения с БД прерывают импорт.
+    """
+    report = ImportReport()
+    now = datetime.now()
+    batch: List[Tuple[int, PostResponse]] = []
+
+    def write(rows: List[Tuple[int, PostResponse]]):
+        try:
+            _copy_batch([post for _, post in rows])
+            report.imported += len(rows)
+        except ROW_ERRORS as e:
+            if len(rows) == 1:
+                report.add_error(rows[0][0], f"Ошибка записи: {e}")
+                return
+            middle = len(rows) // 2
+            write(rows[:middle])
+            write(rows[middle:])
+
+    def flush():
+        if batch:
+            write(list(batch))
+            batch.clear()
+
+    for row_number, row in _read_rows(stream, fmt):
+        try:
+            batch.append((row_number, _to_post(row, owner, now)))
+        except (ValidationError, ValueError) as e:
+            report.add_error(row_number, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if report.imported:
+        print(f"📥 Импортировано {report.imported} постов, ошибок: {report.failed}.")
+    return report
+
+
+def iter_posts(status: Optional[ModerationStatus] = None, batch_size: int = settings.BULK_BATCH_SIZE) -> Iterator[PostResponse]:
+    """Постранично выбрать посты (по возрастанию id) вместе с изображениями."""
+    last_id = None
+    with Session(engine) as session:
+        while True:
+            stmt = select(Post).where(Post.deleted_at.is_(None))
+            if status is not None:
+                stmt = stmt.where(Post.moderation_status == status)
+            if last_id is not None:
+                stmt = stmt.where(Post.id > last_id)
+            posts = session.exec(stmt.order_by(Post.id).limit(batch_size)).all()
+            if not posts:
+                return
+
+            images: Dict[uuid.UUID, List[PostImage]] = {post.id: [] for post in posts}
+            for image in session.exec(select(PostImage).where(PostImage.post_id.in_(list(images)))).all():
+                images[image.post_id].append(image)
+            for post in posts:
+                post.images = images[post.id]
+                yield PostResponse.model_validate(post)
+
+            last_id = posts[-1].id
+            session.expunge_all()
+
+
+def export_posts(fmt: str, status: Optional[ModerationStatus] = None) -> Iterator[str]:
+    """Экспортировать посты построчно в JSONL или CSV."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for post in iter_posts(status):
+            row = post.model_dump(mode="json")
+            row["images"] = " ".join(image["image_url"] for image in row["images"])
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.getvalue():
+            yield buffer.getvalue()
+        return
+
+    for post in iter_posts(status):
+        yield post.model_dump_json() + "\n"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m core.bulk", description="Массовый импорт и экспорт постов")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Импортировать посты в очередь модерации")
+    import_parser.add_argument("path", help="Файл с постами или - для stdin")
+    import_parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    import_parser.add_argument("--owner-email", required=True, help="Владелец импортируемых постов")
+
+    export_parser = subparsers.add_parser("export", help="Выгрузить посты в stdout")
+    export_parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    export_parser.add_argument("--status", choices=[status.value for status in ModerationStatus])
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        status = ModerationStatus(args.status) if args.status else None
+        for chunk in export_posts(args.format, status):
+            sys.stdout.write(chunk)
+        return
+
+    with Session(engine) as session:
+        owner = session.exec(select(User).where(User.email == args.owner_email)).first()
+    if not owner:
+        parser.error(f"Пользователь {args.owner_email} не найден")
+
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+    try:
+        report = import_posts(stream, args.format, owner)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    json.dump(report.as_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
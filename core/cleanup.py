@@ -1,23 +1,102 @@
-import threading
-import time
 from datetime import datetime
-from models.models import VerificationCode
-from db import session
-
-
-def cleanup_verification_codes():
-    while True:
-        try:
-            now = datetime.now()
-            deleted = session.query(VerificationCode).filter(VerificationCode.expires_at < now).delete()
-            session.commit()
-            if deleted:
-                print(f"🧹 Удалено {deleted} просроченных кодов.")
-        except Exception as e:
-            print(f"⚠️ Ошибка при очистке кодов: {e}")
-
-        time.sleep(900)
-
-def start_cleanup_thread():
-    thread = threading.Thread(target=cleanup_verification_codes, daemon=True)
-    thread.start()
\ No newline at end of file
+from sqlalchemy import delete, exists
+from sqlmodel import Session, select
+from models.models import VerificationCode, Post, PostImage, PostViewCount, StoredFile
+from core.config import settings
+from core.scheduler import Scheduler
+from core.stats import reconcile_counters
+from core.image_store import release_images
+from core.upload_config import delete_files_from_s3, key_from_url, public_url
+from db import engine
+
+
+def purge_deleted_posts(batch_size: int = settings.POST_PURGE_BATCH_SIZE) -> int:
+    """Удалить мягко удалённые посты: освободить ссылки на файлы, затем удалить строки изображений и постов.
+    Сами объекты в хранилище удаляет collect_unreferenced_files."""
+    purged = 0
+    with Session(engine) as db_session:
+        while True:
+            post_ids = db_session.exec(
+                select(Post.id).where(Post.deleted_at.is_not(None)).order_by(Post.deleted_at).limit(batch_size)
+            ).all()
+            if not post_ids:
+                break
+
+            images = db_session.exec(select(PostImage).where(PostImage.post_id.in_(post_ids))).all()
+            release_images(db_session, [image.image_url for image in images])
+            db_session.execute(delete(PostImage).where(PostImage.post_id.in_(post_ids)))
+            db_session.execute(delete(PostViewCount).where(PostViewCount.post_id.in_(post_ids)))
+            db_session.execute(delete(Post).where(Post.id.in_(post_ids)))
+            db_session.commit()
+
+            purged += len(post_ids)
+            if len(post_ids) < batch_size:
+                break
+
+        # Буфер воркера может сбросить просмотры уже после удаления поста: такие строки тоже убираем
+        db_session.execute(
+            delete(PostViewCount).where(~exists().where(Post.id == PostViewCount.post_id))
+        )
+        db_session.commit()
+
+    if purged:
+        print(f"🧹 Удалено {purged} постов.")
+    return purged
+
+
+def collect_unreferenced_files(batch_size: int = settings.STORAGE_GC_BATCH_SIZE) -> int:
+    """Удалить из хранилища объекты без ссылок. Строки блокируются на время удаления,
+    поэтому параллельная загрузка того же файла дождётся конца и загрузит его заново.
+    Объекты, которые не удалось удалить, остаются до следующего прохода."""
+    collected = 0
+    with Session(engine) as db_session:
+        while True:
+            keys = db_session.exec(
+                select(StoredFile.key)
+                .where(StoredFile.ref_count == 0)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not keys:
+                break
+
+            deleted_urls = delete_files_from_s3([public_url(key) for key in keys])
+            deleted_keys = [key_from_url(url) for url in deleted_urls]
+            if deleted_keys:
+                db_session.execute(
+                    delete(StoredFile).where(StoredFile.key.in_(deleted_keys), StoredFile.ref_count == 0)
+                )
+            db_session.commit()
+
+            collected += len(deleted_keys)
+            # Хранилище недоступно или батч неполный — остальное доделает следующий проход
+            if len(deleted_keys) < len(keys) or len(keys) < batch_size:
+                break
+
+    if collected:
+        print(f"🧹 Удалено {collected} файлов из хранилища.")
+    return collected
+
+
+def delete_expired_codes(batch_size: int = settings.CODE_CLEANUP_BATCH_SIZE) -> int:
+    """Удалить просроченные коды партиями, чтобы не держать долгие блокировки."""
+    deleted = 0
+    with Session(engine) as db_session:
+        while True:
+            ids = select(VerificationCode.id).where(VerificationCode.expires_at < datetime.now()).limit(batch_size)
+            result = db_session.execute(delete(VerificationCode).where(VerificationCode.id.in_(ids.scalar_subquery())))
+            db_session.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+
+    if deleted:
+        print(f"🧹 Удалено {deleted} просроченных кодов.")
+    return deleted
+
+
+def register_cleanup_jobs(scheduler: Scheduler):
+    scheduler.register("expired_codes", delete_expired_codes, settings.CLEANUP_INTERVAL_SECONDS)
+    scheduler.register("purge_deleted_posts", purge_deleted_posts, settings.CLEANUP_INTERVAL_SECONDS)
+    scheduler.register("storage_gc", collect_unreferenced_files, settings.CLEANUP_INTERVAL_SECONDS)
+    scheduler.register("reconcile_stats", reconcile_counters, settings.STATS_RECONCILE_INTERVAL_SECONDS)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,6 +10,26 @@ class Settings(BaseSettings):
     TMP_TOKEN_EXPIRE_MINUTES: int = 10
     VERIFICATION_CODE_EXPIRE_MINUTES: int = 10
     CODE_RATE_LIMIT_SECONDS: int = 60
+    POST_CACHE_TTL_SECONDS: float = 5
+    POST_PURGE_BATCH_SIZE: int = 100
+    STORAGE_GC_BATCH_SIZE: int = 500
+    BULK_BATCH_SIZE: int = 500
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 10
+    VIEW_FLUSH_MAX_PENDING: int = 1000
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None
+    SERVER_BACKLOG: int = 2048
+    KEEP_ALIVE_SECONDS: int = 5
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    MAX_IMAGE_BYTES: int = 10 * 1024 * 1024
+    MAX_REQUEST_IMAGES_BYTES: int = 40 * 1024 * 1024
+    CODE_CLEANUP_BATCH_SIZE: int = 1000
+    CLEANUP_INTERVAL_SECONDS: int = 900
+    STATS_RECONCILE_INTERVAL_SECONDS: int = 3600
+    SCHEDULER_LOCK_ID: int = 72541
+    SCHEDULER_TICK_SECONDS: float = 5
 
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
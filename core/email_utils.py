@@ -3,7 +3,9 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from core.config import settings
 
-async def send_email(to_email: str, subject: str, body: str):
+# Обычная функция, а не async: smtplib блокирующий, и BackgroundTasks выполнит её в пуле потоков,
+# не останавливая event loop воркера
+def send_email(to_email: str, subject: str, body: str):
     try:
         msg = MIMEMultipart()
         msg["From"] = settings.FROM_EMAIL
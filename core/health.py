@@ -0,0 +1,54 @@
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+
+
+class WorkerState:
+    """Состояние воркера для проб: готов после запуска, перестаёт быть готовым при остановке."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self.ready = False
+        self.draining = False
+
+    @property
+    def uptime_seconds(self) -> float:
+        return time.monotonic() - self._started
+
+    def mark_ready(self):
+        self.pid = os.getpid()
+        self.ready = True
+        self.draining = False
+
+    def mark_draining(self):
+        self.draining = True
+        self.ready = False
+
+
+worker_state = WorkerState()
+
+
+def install_drain_signal_handlers():
+    """
+    Снимать готовность сразу по SIGTERM/SIGINT, до того как сервер дождётся текущих запросов.
+    Обработчики сервера сохраняются и вызываются следом, поэтому вызывать эту функцию нужно
+    после того, как сервер их установил (в lifespan).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+
+        def handler(sig, frame, previous=previous):
+            worker_state.mark_draining()
+            if callable(previous):
+                previous(sig, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(sig, signal.SIG_DFL)
+                os.kill(os.getpid(), sig)
+
+        signal.signal(signum, handler)
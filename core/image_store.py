@@ -0,0 +1,56 @@
+from collections import Counter
+from typing import List
+
+from fastapi import UploadFile
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from core.upload_validation import IMAGE_EXTENSIONS
+from core.upload_config import content_key, is_stored_url, key_from_url, public_url, upload_file_to_s3
+from models.models import StoredFile
+
+
+def store_image(session: Session, file: UploadFile, content_type: str) -> str:
+    """
+    Сохранить изображение под ключом-хэшем содержимого и увеличить счётчик ссылок.
+    content_type — тип, определённый validate_images по содержимому файла.
+    Если такой файл уже есть в хранилище, повторная загрузка пропускается.
+    Изменение счётчика фиксируется вместе с транзакцией вызывающего кода.
+    """
+    key = content_key(file, IMAGE_EXTENSIONS[content_type])
+    table = StoredFile.__table__
+    stmt = (
+        insert(table)
+        .values(key=key, ref_count=1, content_type=content_type)
+        .on_conflict_do_update(index_elements=[table.c.key], set_={"ref_count": table.c.ref_count + 1})
+        .returning(table.c.ref_count)
+    )
+    # Строка остаётся заблокированной до коммита, поэтому сборщик мусора не удалит объект во время загрузки
+    ref_count = session.execute(stmt).scalar_one()
+    if ref_count == 1:
+        upload_file_to_s3(file, key, content_type)
+    return public_url(key)
+
+
+def release_images(session: Session, image_urls: List[str]):
+    """
+    Уменьшить счётчики ссылок на изображения. Объекты с нулевым счётчиком удаляет
+    фоновая задача collect_unreferenced_files. Файлы, загруженные до введения
+    счётчиков, сразу помечаются как неиспользуемые. Внешние ссылки (например, из
+    массового импорта) пропускаются.
+    """
+    counts = Counter(key_from_url(image_url) for image_url in image_urls if is_stored_url(image_url))
+    if not counts:
+        return
+
+    known = set(session.exec(select(StoredFile.key).where(StoredFile.key.in_(list(counts)))).all())
+    for key, count in counts.items():
+        if key in known:
+            session.execute(
+                update(StoredFile)
+                .where(StoredFile.key == key)
+                .values(ref_count=func.greatest(StoredFile.ref_count - count, 0))
+            )
+        else:
+            session.execute(insert(StoredFile.__table__).values(key=key, ref_count=0).on_conflict_do_nothing())
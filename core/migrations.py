@@ -0,0 +1,92 @@
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import SQLModel
+
+import models.models  # noqa: F401  регистрирует таблицы в SQLModel.metadata
+
+# Произвольный ключ advisory lock, под которым воркеры по очереди применяют миграции
+MIGRATION_LOCK_ID = 72540
+
+
+def _baseline(connection: Connection):
+    # Для уже существующей БД create_all пропускает созданные таблицы и добавляет только новые
+    SQLModel.metadata.create_all(connection)
+
+
+def _post_deleted_at(connection: Connection):
+    connection.execute(text("ALTER TABLE post ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITHOUT TIME ZONE"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_post_deleted_at ON post (deleted_at)"))
+
+
+def _post_counters(connection: Connection):
+    connection.execute(text("ALTER TABLE post ADD COLUMN IF NOT EXISTS submitted_at TIMESTAMP WITHOUT TIME ZONE"))
+    connection.execute(text("ALTER TABLE post ADD COLUMN IF NOT EXISTS moderated_at TIMESTAMP WITHOUT TIME ZONE"))
+    SQLModel.metadata.tables["postcounter"].create(connection, checkfirst=True)
+
+
+def _post_view_counts(connection: Connection):
+    SQLModel.metadata.tables["postviewcount"].create(connection, checkfirst=True)
+
+
+# Миграции применяются по порядку. Новую миграцию добавляйте в конец списка со следующим номером,
+# уже применённые не меняйте. Каждая миграция должна быть идемпотентной.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline", _baseline),
+    (2, "post_deleted_at", _post_deleted_at),
+    (3, "post_counters", _post_counters),
+    (4, "post_view_counts", _post_view_counts),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _current_version(connection: Connection) -> int:
+    connection.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    version = connection.execute(text("SELECT version FROM schema_version")).scalar()
+    if version is None:
+        connection.execute(text("INSERT INTO schema_version (version) VALUES (0)"))
+        return 0
+    return version
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Привести схему БД к последней версии и вернуть её номер.
+
+    При актуальной схеме выполняется один запрос к schema_version вместо отражения всех таблиц.
+    Если миграции нужны, воркеры применяют их по очереди под advisory lock.
+    """
+    with engine.connect() as connection:
+        try:
+            version = connection.execute(text("SELECT version FROM schema_version")).scalar()
+        except Exception:
+            connection.rollback()
+            version = None
+        else:
+            connection.commit()
+        if version == LATEST_VERSION:
+            return version
+
+    uses_advisory_lock = engine.dialect.name == "postgresql"
+    with engine.connect() as connection:
+        if uses_advisory_lock:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            with connection.begin():
+                version = _current_version(connection)
+            for migration_version, name, migrate in MIGRATIONS:
+                if migration_version <= version:
+                    continue
+                with connection.begin():
+                    migrate(connection)
+                    connection.execute(text("UPDATE schema_version SET version = :version"), {"version": migration_version})
+                print(f"🗄 Применена миграция {migration_version}: {name}")
+                version = migration_version
+        finally:
+            if uses_advisory_lock:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                connection.commit()
+    return version
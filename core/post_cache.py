@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from core.config import settings
+from models.models import ModerationStatus
+
+
+class _Flight:
+    """Одна загрузка из БД, результат которой ждут все конкурентные запросы."""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlightCache:
+    """
+    Кэш горячих ключей с коротким TTL и объединением конкурентных промахов.
+
+    Одновременные промахи по одному ключу выполняют loader один раз, остальные
+    потоки ждут его результат. В кэш попадают только значения, для которых
+    should_cache вернул True. Кэш живёт в памяти воркера: invalidate сбрасывает
+    запись только локально, поэтому в других воркерах устаревание ограничено TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, should_cache: Callable[[object], bool] = lambda value: value is not None):
+        self.ttl_seconds = ttl_seconds
+        self._should_cache = should_cache
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, object]] = {}
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._generations: Dict[Hashable, int] = {}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], object]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    return entry[1]
+                del self._entries[key]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                generation = self._generations.get(key, 0)
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                # Если ключ инвалидировали во время загрузки, результат мог устареть — не кэшируем
+                if (
+                    flight.error is None
+                    and self.ttl_seconds > 0
+                    and self._generations.get(key, 0) == generation
+                    and self._should_cache(flight.result)
+                ):
+                    self._entries[key] = (time.monotonic() + self.ttl_seconds, flight.result)
+                # Поколение нужно только пока идёт загрузка; по ключу одновременно идёт не больше одной
+                self._generations.pop(key, None)
+            flight.event.set()
+
+        return flight.result
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+            if key in self._inflight:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            else:
+                self._generations.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for key in self._inflight:
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+
+def _is_approved(post) -> bool:
+    return post is not None and post.moderation_status == ModerationStatus.APPROVED
+
+
+# Кэшируются только одобренные посты: их видят все, поэтому правила видимости не нарушаются
+post_cache = SingleFlightCache(settings.POST_CACHE_TTL_SECONDS, should_cache=_is_approved)
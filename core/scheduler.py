@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from core.config import settings
+from db import engine
+
+
+class Job:
+    """Периодическая задача планировщика и метрики её запусков."""
+
+    def __init__(self, name: str, func: Callable[[], object], interval_seconds: float, jitter: float = 0.1):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.jitter = jitter
+        # Первый запуск — вскоре после старта, со случайным сдвигом в пределах джиттера
+        self.next_run_at = time.monotonic() + random.uniform(0, interval_seconds * jitter)
+        self.runs = 0
+        self.failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_result: object = None
+        self.last_error: Optional[str] = None
+
+    def _next_delay(self) -> float:
+        # Джиттер разносит запуски, чтобы задачи и кластеры не стартовали синхронно
+        spread = self.interval_seconds * self.jitter
+        return max(0.0, self.interval_seconds + random.uniform(-spread, spread))
+
+    def run(self):
+        self.last_started_at = datetime.now()
+        started = time.perf_counter()
+        try:
+            self.last_result = self.func()
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"⚠️ Ошибка в задаче {self.name}: {e}")
+        finally:
+            self.runs += 1
+            self.last_duration_seconds = time.perf_counter() - started
+            self.next_run_at = time.monotonic() + self._next_delay()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """
+    Планировщик периодических задач с одним лидером на кластер.
+
+    Каждый воркер запускает планировщик, но задачи выполняет только тот, кто удерживает
+    advisory lock в Postgres. Блокировка живёт в отдельном соединении: если воркер падает,
+    соединение закрывается и лидерство переходит к другому воркеру. Для SQLite воркер
+    всегда считается лидером.
+    """
+
+    def __init__(self, lock_id: int, tick_seconds: float):
+        self.lock_id = lock_id
+        self.tick_seconds = tick_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_connection = None
+        self._uses_advisory_lock = engine.dialect.name == "postgresql"
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_connection is not None or not self._uses_advisory_lock
+
+    def register(self, name: str, func: Callable[[], object], interval_seconds: float, jitter: float = 0.1) -> Job:
+        job = Job(name, func, interval_seconds, jitter)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Остановить цикл, дождаться текущей задачи и отдать лидерство."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> List[dict]:
+        return [job.stats() for job in self.jobs.values()]
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if self._ensure_leadership():
+                    for job in self.jobs.values():
+                        if self._stop.is_set():
+                            break
+                        if job.next_run_at <= time.monotonic():
+                            job.run()
+                self._stop.wait(self.tick_seconds)
+        finally:
+            self._release_leadership()
+
+    def _ensure_leadership(self) -> bool:
+        if not self._uses_advisory_lock:
+            return True
+        try:
+            if self._lock_connection is not None:
+                # Проверяем, что соединение с блокировкой всё ещё живо
+                self._lock_connection.execute(text("SELECT 1"))
+                self._lock_connection.commit()
+                return True
+            connection = engine.connect()
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}).scalar()
+            connection.commit()
+            if not acquired:
+                connection.close()
+                return False
+            self._lock_connection = connection
+            print("🗓 Воркер стал лидером планировщика.")
+            return True
+        except Exception as e:
+            print(f"⚠️ Потеряно соединение планировщика: {e}")
+            self._release_leadership()
+            return False
+
+    def _release_leadership(self):
+        connection, self._lock_connection = self._lock_connection, None
+        if connection is None:
+            return
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": self.lock_id})
+            connection.commit()
+        except Exception:
+            pass
+        finally:
+            connection.close()
+
+
+scheduler = Scheduler(settings.SCHEDULER_LOCK_ID, settings.SCHEDULER_TICK_SECONDS)
@@ -0,0 +1,33 @@
+import time
+from typing import List, Tuple
+
+
+class StartupProfile:
+    """Замеры этапов запуска воркера: время от начала импорта приложения до готовности."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages: List[Tuple[str, float]] = []
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    @property
+    def total_seconds(self) -> float:
+        return self._last - self.started
+
+    def report(self) -> dict:
+        return {
+            "total_seconds": round(self.total_seconds, 4),
+            "stages": [{"stage": stage, "seconds": round(seconds, 4)} for stage, seconds in self.stages],
+        }
+
+    def print_report(self):
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f} мс" for stage, seconds in self.stages)
+        print(f"🚀 Воркер готов за {self.total_seconds * 1000:.0f} мс ({stages})")
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,81 @@
+import json
+import os
+from typing import Set
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from core.asset_build import MANIFEST
+
+# Варианты в порядке предпочтения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Кодировки из Accept-Encoding, кроме явно запрещённых через q=0."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Отдаёт сборку из core.asset_build: заранее сжатый вариант файла по Accept-Encoding,
+    а файлы с хэшем в имени — с Cache-Control: immutable. Остальные файлы (index.html)
+    браузер перепроверяет при каждом открытии.
+    """
+
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.fingerprinted = {output for source, output in manifest.items() if output != source}
+
+    def _cache_control(self, name: str) -> str:
+        return IMMUTABLE_CACHE_CONTROL if name in self.fingerprinted else "no-cache"
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if isinstance(response, NotModifiedResponse):
+            # 304 должен нести те же заголовки кэширования, что и полный ответ
+            name = os.path.relpath(self.lookup_path(path)[0], os.path.realpath(self.directory)).replace(os.sep, "/")
+            response.headers["Cache-Control"] = self._cache_control(name)
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        if not isinstance(response, FileResponse):
+            return response
+
+        name = os.path.relpath(response.path, os.path.realpath(self.directory)).replace(os.sep, "/")
+        cache_control = self._cache_control(name)
+
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            variant_path = response.path + suffix
+            if encoding in accepted and os.path.isfile(variant_path):
+                response = FileResponse(
+                    variant_path,
+                    stat_result=os.stat(variant_path),
+                    media_type=response.media_type,
+                    headers={"Content-Encoding": encoding},
+                )
+                # ETag варианта отличается от исходного файла, поэтому условный запрос проверяем заново
+                if self.is_not_modified(response.headers, request_headers):
+                    response = NotModifiedResponse(response.headers)
+                break
+
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
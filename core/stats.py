@@ -0,0 +1,170 @@
+"""
+Счётчики постов для статистики админов.
+
+Каждый живой (не удалённый) пост учитывается в строках PostCounter по измерениям:
+все посты, город, день создания и — для уже промодерированных постов — интервал
+задержки модерации (от подачи на модерацию до решения). Счётчики меняются в той же
+транзакции, что и пост, а периодическая сверка пересчитывает их по таблице постов.
+"""
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from db import engine
+from models.models import ModerationStatus, Post, PostCounter
+
+# Нижние границы интервалов задержки модерации в секундах (интервал i — [BOUNDS[i-1], BOUNDS[i]))
+LATENCY_BOUNDS = [60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 2 * 86400, 7 * 86400]
+LATENCY_PERCENTILES = (50, 90, 99)
+
+CounterKey = Tuple[str, str, str]
+
+
+def latency_bucket(seconds: float) -> int:
+    # Совпадает с width_bucket(seconds, LATENCY_BOUNDS) в Postgres, которым пользуется сверка
+    return bisect_right(LATENCY_BOUNDS, seconds)
+
+
+def counter_keys(
+    status: ModerationStatus,
+    city: Optional[str],
+    created_at: datetime,
+    latency_seconds: Optional[float] = None,
+) -> List[CounterKey]:
+    status = ModerationStatus(status).value
+    keys = [
+        ("all", "", status),
+        ("city", city or "", status),
+        ("day", created_at.date().isoformat(), status),
+    ]
+    if latency_seconds is not None and status != ModerationStatus.PENDING.value:
+        keys.append(("latency", str(latency_bucket(latency_seconds)), status))
+    return keys
+
+
+def post_counter_keys(post: Post) -> List[CounterKey]:
+    """Строки счётчиков, в которых учтён пост в текущем состоянии."""
+    if post.deleted_at is not None:
+        return []
+    latency_seconds = None
+    if post.moderated_at is not None:
+        latency_seconds = (post.moderated_at - (post.submitted_at or post.created_at)).total_seconds()
+    return counter_keys(post.moderation_status, post.city, post.created_at, latency_seconds)
+
+
+def apply_counter_deltas(connection, before: List[CounterKey], after: List[CounterKey]):
+    """
+    Перенести посты из строк before в строки after (повторяющиеся ключи суммируются).
+    connection — Session или Connection; изменения фиксируются вместе с транзакцией вызывающего кода.
+    """
+    deltas = Counter(after)
+    deltas.subtract(before)
+    _apply_deltas(connection, deltas)
+
+
+def _apply_deltas(connection, deltas: Dict[CounterKey, int]):
+    table = PostCounter.__table__
+    for (dimension, value, status), delta in sorted(deltas.items()):
+        if delta == 0:
+            continue
+        connection.execute(
+            insert(table)
+            .values(dimension=dimension, value=value, moderation_status=status, count=delta)
+            .on_conflict_do_update(
+                index_elements=[table.c.dimension, table.c.value, table.c.moderation_status],
+                set_={"count": table.c.count + delta},
+            )
+        )
+
+
+def reconcile_counters() -> int:
+    """
+    Исправить расхождения счётчиков с таблицей постов. Возвращает число исправленных строк.
+
+    Посты и счётчики читаются в одном снимке REPEATABLE READ без блокировок. Счётчики
+    меняются в одной транзакции с постами, поэтому разница в снимке — это именно дрейф;
+    она применяется приращениями и не затирает изменения, сделанные после снимка.
+    """
+    queries = [
+        "SELECT 'all', '', moderation_status, count(*) FROM post WHERE deleted_at IS NULL GROUP BY moderation_status",
+        "SELECT 'city', coalesce(city, ''), moderation_status, count(*) FROM post WHERE deleted_at IS NULL GROUP BY 2, 3",
+        "SELECT 'day', to_char(created_at, 'YYYY-MM-DD'), moderation_status, count(*) FROM post WHERE deleted_at IS NULL GROUP BY 2, 3",
+        "SELECT 'latency', width_bucket(extract(epoch FROM moderated_at - coalesce(submitted_at, created_at))::double precision, "
+        "CAST(:bounds AS double precision[]))::text, moderation_status, count(*) FROM post "
+        "WHERE deleted_at IS NULL AND moderated_at IS NOT NULL AND moderation_status != 'PENDING' GROUP BY 2, 3",
+    ]
+    drift: Counter = Counter()
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as connection:
+        for query in queries:
+            for dimension, value, status, count in connection.execute(text(query), {"bounds": LATENCY_BOUNDS}):
+                drift[(dimension, value, ModerationStatus[status].value)] += count
+        for dimension, value, status, count in connection.execute(
+            text("SELECT dimension, value, moderation_status, count FROM postcounter")
+        ):
+            drift[(dimension, value, status)] -= count
+        connection.rollback()
+
+    fixed = sum(1 for delta in drift.values() if delta)
+    with Session(engine) as session:
+        _apply_deltas(session, drift)
+        session.execute(text("DELETE FROM postcounter WHERE count = 0"))
+        session.commit()
+
+    if fixed:
+        print(f"📊 Исправлено {fixed} счётчиков статистики.")
+    return fixed
+
+
+def _latency_percentiles(buckets: Dict[int, int]) -> Dict[str, Optional[int]]:
+    """Процентили по гистограмме: верхняя граница интервала, в который попал процентиль."""
+    total = sum(buckets.values())
+    result = {}
+    for percentile in LATENCY_PERCENTILES:
+        bound = None
+        if total:
+            threshold = total * percentile / 100
+            cumulative = 0
+            for bucket in sorted(buckets):
+                cumulative += buckets[bucket]
+                if cumulative >= threshold:
+                    bound = LATENCY_BOUNDS[bucket] if bucket < len(LATENCY_BOUNDS) else None
+                    break
+        result[f"p{percentile}_seconds_at_most"] = bound
+    return result
+
+
+def get_stats(session: Session, days: int) -> dict:
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    counters = session.exec(
+        select(PostCounter).where(
+            PostCounter.count != 0,
+            or_(PostCounter.dimension != "day", PostCounter.value >= since),
+        )
+    ).all()
+
+    by_status: Dict[str, int] = {status.value: 0 for status in ModerationStatus}
+    by_city: Dict[str, Dict[str, int]] = {}
+    by_day: Dict[str, Dict[str, int]] = {}
+    latency: Dict[int, int] = {}
+    for counter in counters:
+        if counter.dimension == "all":
+            by_status[counter.moderation_status] = counter.count
+        elif counter.dimension == "city":
+            by_city.setdefault(counter.value, {})[counter.moderation_status] = counter.count
+        elif counter.dimension == "day":
+            by_day.setdefault(counter.value, {})[counter.moderation_status] = counter.count
+        elif counter.dimension == "latency":
+            bucket = int(counter.value)
+            latency[bucket] = latency.get(bucket, 0) + counter.count
+
+    return {
+        "by_status": by_status,
+        "by_city": by_city,
+        "by_day": dict(sorted(by_day.items())),
+        "moderation_latency": _latency_percentiles(latency),
+    }
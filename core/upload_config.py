@@ -1,58 +1,100 @@
-import boto3
+import hashlib
 import uuid
+from functools import lru_cache
+from typing import List, Optional
 from fastapi import UploadFile
 from core.config import settings
 
 # --- S3 Configuration ---
 
+# delete_objects accepts at most 1000 keys per request
+S3_DELETE_BATCH_SIZE = 1000
+HASH_CHUNK_SIZE = 1024 * 1024
 
-# Initialize S3 client
-s3_client = boto3.client(
-    "s3",
-    endpoint_url=settings.S3_ENDPOINT_URL,
-    aws_access_key_id=settings.S3_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
-    region_name=settings.S3_REGION, # For S3-compatible storage, the region is often nominal
-)
 
-def upload_file_to_s3(file: UploadFile) -> str:
+@lru_cache(maxsize=None)
+def get_s3_client():
     """
-    Uploads a file to S3 and returns its public URL.
+    Creates the S3 client on first use. boto3 is imported here rather than at module
+    import time, which keeps worker startup fast.
+    """
+    import boto3
+
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        region_name=settings.S3_REGION, # For S3-compatible storage, the region is often nominal
+    )
+
+def content_key(file: UploadFile, file_extension: str) -> str:
+    """
+    Hashes the file in chunks and returns its content-addressed object key.
+    The file position is reset to the beginning afterwards.
+    """
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.file.seek(0)
+
+    return f"{digest.hexdigest()}.{file_extension}"
+
+def public_url(key: str) -> str:
+    return f"{settings.S3_PUBLIC_URL}/{key}"
+
+def is_stored_url(image_url: str) -> bool:
+    return image_url.startswith(f"{settings.S3_PUBLIC_URL}/")
+
+def key_from_url(image_url: str) -> str:
+    # URL format: https://3mwvmd.leapcellobj.com/{S3_BUCKET_NAME}/{filename}
+    return image_url.split("/")[-1]
+
+def upload_file_to_s3(file: UploadFile, key: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """
+    Uploads a file to S3 under the given key (a random one by default) and returns its public URL.
     """
     try:
-        file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
+        if key is None:
+            file_extension = file.filename.split(".")[-1]
+            key = f"{uuid.uuid4()}.{file_extension}"
 
-        s3_client.upload_fileobj(
+        get_s3_client().upload_fileobj(
             file.file,
             settings.S3_BUCKET_NAME,
-            unique_filename,
+            key,
             ExtraArgs={
-                "ContentType": file.content_type,
+                "ContentType": content_type or file.content_type,
                 "ACL": "public-read",
             },
         )
 
         # Return the public URL of the file
-        return f"{settings.S3_PUBLIC_URL}/{unique_filename}"
+        return public_url(key)
     except Exception as e:
         print(f"Error uploading to S3: {e}")
         raise
 
-def delete_file_from_s3(image_url: str) -> bool:
+def delete_files_from_s3(image_urls: List[str]) -> List[str]:
     """
-    Deletes a file from S3 by its public URL.
-    Returns True if successful, False otherwise.
+    Deletes files from S3 in batches of up to 1000 keys per request.
+    Returns the URLs that were deleted successfully.
     """
-    try:
-        # URL format: https://3mwvmd.leapcellobj.com/{S3_BUCKET_NAME}/{filename}
-        filename = image_url.split("/")[-1]
-        
-        s3_client.delete_objects(
-            Bucket=settings.S3_BUCKET_NAME,
-            Delete={"Objects": [{"Key": filename}]}
-        )
-        return True
-    except Exception as e:
-        print(f"Error deleting from S3: {e}", filename)
-        return False
\ No newline at end of file
+    keys = {key_from_url(image_url): image_url for image_url in image_urls}
+    key_list = list(keys)
+    deleted = []
+    for start in range(0, len(key_list), S3_DELETE_BATCH_SIZE):
+        batch = key_list[start:start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = get_s3_client().delete_objects(
+                Bucket=settings.S3_BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+            )
+        except Exception as e:
+            print(f"Error deleting from S3: {e}")
+            continue
+        failed = {error["Key"] for error in response.get("Errors", [])}
+        for error in response.get("Errors", []):
+            print(f"Error deleting from S3: {error.get('Message')}", error["Key"])
+        deleted.extend(keys[key] for key in batch if key not in failed)
+    return deleted
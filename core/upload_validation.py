@@ -0,0 +1,147 @@
+from typing import List, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+from core.config import settings
+
+# Сигнатуры (magic bytes) разрешённых форматов изображений
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+IMAGE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+# Запас на текстовые поля и служебные заголовки multipart поверх бюджета изображений
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Определить тип изображения по первым байтам файла."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _file_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+def validate_images(files: List[UploadFile]) -> List[str]:
+    """
+    Проверить размер и содержимое изображений до загрузки в хранилище.
+    Возвращает определённые по содержимому MIME-типы в порядке файлов.
+    """
+    content_types = []
+    total = 0
+    for file in files:
+        size = _file_size(file)
+        if size > settings.MAX_IMAGE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Файл {file.filename} больше {settings.MAX_IMAGE_BYTES // (1024 * 1024)} МБ",
+            )
+        total += size
+        if total > settings.MAX_REQUEST_IMAGES_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Суммарный размер изображений больше {settings.MAX_REQUEST_IMAGES_BYTES // (1024 * 1024)} МБ",
+            )
+
+        header = file.file.read(16)
+        file.file.seek(0)
+        content_type = sniff_image_type(header)
+        if content_type is None:
+            raise HTTPException(status_code=415, detail=f"Файл {file.filename} не является изображением JPEG, PNG, GIF или WebP")
+        content_types.append(content_type)
+    return content_types
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """
+    Ограничивает размер multipart-запросов, пока тело ещё читается из сокета.
+
+    FastAPI сохраняет файлы на диск или в память до вызова обработчика, поэтому лимит
+    проверяется здесь: по Content-Length сразу, а при потоковой передаче — по мере чтения.
+    """
+
+    def __init__(self, app, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            # FastAPI превращает ошибку чтения тела в 400; после переполнения её ответ не отправляем
+            if too_large and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+        if too_large and not response_started:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Запрос больше {self.max_body_bytes // (1024 * 1024)} МБ"},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
+
+
+def max_upload_request_bytes() -> int:
+    return settings.MAX_REQUEST_IMAGES_BYTES + MULTIPART_OVERHEAD_BYTES
@@ -0,0 +1,138 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from core.config import settings
+from db import engine
+from models.models import PostViewCount
+
+# Сколько постов записывать одним INSERT
+FLUSH_BATCH_SIZE = 1000
+
+
+class ViewCounter:
+    """
+    Буфер просмотров постов в памяти воркера с периодическим сбросом в PostViewCount.
+
+    Просмотры накапливаются и записываются пачкой upsert'ов раз в flush_interval секунд
+    или раньше, если накопилось max_pending просмотров. При падении воркера теряются
+    только несброшенные просмотры: не больше max_pending и не старше flush_interval.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: Dict[UUID, int] = {}
+        self._pending_views = 0
+        self._oldest_pending_at: Optional[float] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.failures = 0
+        self.flushed_views = 0
+        self.last_flush_at: Optional[datetime] = None
+        self.last_flush_lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def record(self, post_id: UUID):
+        with self._lock:
+            self._pending[post_id] = self._pending.get(post_id, 0) + 1
+            self._pending_views += 1
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.monotonic()
+            if self._pending_views >= self.max_pending:
+                self._wake.set()
+
+    def flush(self) -> int:
+        """Записать накопленные просмотры. При ошибке они возвращаются в буфер."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            views, self._pending_views = self._pending_views, 0
+            oldest, self._oldest_pending_at = self._oldest_pending_at, None
+        if not pending:
+            return 0
+
+        try:
+            table = PostViewCount.__table__
+            items = list(pending.items())
+            with Session(engine) as session:
+                for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                    stmt = insert(table).values(
+                        [{"post_id": post_id, "views": count} for post_id, count in items[start:start + FLUSH_BATCH_SIZE]]
+                    )
+                    session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[table.c.post_id],
+                            set_={"views": table.c.views + stmt.excluded.views},
+                        )
+                    )
+                session.commit()
+        except Exception as e:
+            with self._lock:
+                for post_id, count in pending.items():
+                    self._pending[post_id] = self._pending.get(post_id, 0) + count
+                self._pending_views += views
+                if self._oldest_pending_at is None or oldest < self._oldest_pending_at:
+                    self._oldest_pending_at = oldest
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"⚠️ Ошибка при записи просмотров: {e}")
+            return 0
+
+        self.flushes += 1
+        self.flushed_views += views
+        self.last_flush_at = datetime.now()
+        self.last_flush_lag_seconds = time.monotonic() - oldest
+        self.last_error = None
+        return views
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="view-counter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Остановить поток и сбросить оставшиеся просмотры."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending_views = self._pending_views
+            pending_posts = len(self._pending)
+            oldest = self._oldest_pending_at
+        return {
+            "flush_interval_seconds": self.flush_interval,
+            "max_pending_views": self.max_pending,
+            "pending_views": pending_views,
+            "pending_posts": pending_posts,
+            "oldest_pending_seconds": None if oldest is None else time.monotonic() - oldest,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "flushed_views": self.flushed_views,
+            "last_flush_at": self.last_flush_at,
+            "last_flush_lag_seconds": self.last_flush_lag_seconds,
+            "last_error": self.last_error,
+        }
+
+
+view_counter = ViewCounter(settings.VIEW_FLUSH_INTERVAL_SECONDS, settings.VIEW_FLUSH_MAX_PENDING)
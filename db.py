@@ -1,6 +1,7 @@
-from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel import create_engine, Session
 
 from core.config import settings
+from core.migrations import run_migrations
 
 DB_URL = settings.DATABASE_URL
 engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {})
@@ -8,7 +9,7 @@ session = Session(autocommit=False, autoflush=False, bind=engine)
 
 
 def init_db():
-    SQLModel.metadata.create_all(engine)
+    return run_migrations(engine)
 
 def get_session():
     with Session(engine) as session:
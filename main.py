@@ -1,19 +1,47 @@
+# Импортируется первым, чтобы замер запуска учитывал импорт остальных модулей
+from core.startup_profile import startup_profile
+
+import os
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from api import auth_routes, user_routes, post_routes, admin_routes, moderator_routes, upload_routes
+from api import auth_routes, user_routes, post_routes, admin_routes, moderator_routes, upload_routes, health_routes
 from db import init_db
-from core.cleanup import start_cleanup_thread
+from core.asset_build import DIST_DIR, MANIFEST
+from core.cleanup import register_cleanup_jobs
+from core.config import settings
+from core.health import install_drain_signal_handlers, worker_state
+from core.scheduler import scheduler
+from core.static_files import PrecompressedStaticFiles
+from core.upload_validation import UploadLimitMiddleware, max_upload_request_bytes
+from core.view_counter import view_counter
+
+startup_profile.mark("imports")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
-    start_cleanup_thread()
+    startup_profile.mark("migrations")
+    register_cleanup_jobs(scheduler)
+    scheduler.start()
+    view_counter.start()
+    startup_profile.mark("scheduler")
+    startup_profile.print_report()
+    install_drain_signal_handlers()
+    worker_state.mark_ready()
     yield
+    worker_state.mark_draining()
+    # Потоки не должны держать воркер дольше GRACEFUL_SHUTDOWN_SECONDS: зависшая задача (например,
+    # запрос к S3) иначе не дала бы процессу завершиться. Просмотры сбрасываются первыми,
+    # чтобы не ждать окончания задачи планировщика
+    deadline = time.monotonic() + settings.GRACEFUL_SHUTDOWN_SECONDS
+    view_counter.stop(timeout=settings.GRACEFUL_SHUTDOWN_SECONDS)
+    scheduler.stop(timeout=max(deadline - time.monotonic(), 0))
 
 
 app = FastAPI(
@@ -23,6 +51,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Отклоняем слишком большие multipart-запросы до того, как файлы будут сохранены во временные файлы
+# Добавляется до CORS, чтобы ответ 413 тоже получил CORS-заголовки
+app.add_middleware(UploadLimitMiddleware, max_body_bytes=max_upload_request_bytes())
+
 # Настройка CORS, чтобы фронтенд на другом домене/порте мог обращаться к API
 # Для продакшена рекомендуется явно перечислить допустимые origins вместо ["*"].
 app.add_middleware(
@@ -39,15 +71,24 @@ app.include_router(post_routes.router, prefix="/posts", tags=["Posts Functions"]
 app.include_router(upload_routes.router, prefix="/upload", tags=["Upload Functions"])
 app.include_router(moderator_routes.router, prefix="/moderator", tags=["Moderator Functions"])
 app.include_router(admin_routes.router, prefix="/admin", tags=["Admin Functions"])
+app.include_router(health_routes.router, prefix="/health", tags=["Health"])
 
 # Откройте в браузере: http://localhost:8000/app
+# Если есть сборка (python -m core.asset_build), отдаём её, иначе исходники для разработки
+if os.path.isfile(os.path.join(DIST_DIR, MANIFEST)):
+    frontend = PrecompressedStaticFiles(directory=DIST_DIR, html=True)
+else:
+    frontend = StaticFiles(directory="JS", html=True)
 app.mount(
     "/app",
-    StaticFiles(directory="JS", html=True),
+    frontend,
     name="frontend",
 )
 
+startup_profile.mark("app")
+
 
+# Для разработки. В продакшене запускайте через serve.py
 if __name__ == "__main__":
     import uvicorn
 
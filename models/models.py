@@ -37,6 +37,25 @@ class VerificationCode(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.now)
     expires_at: datetime
 
+class PostCounter(SQLModel, table=True):
+    """Число живых постов в разрезе измерения (all, city, day, latency) и статуса модерации."""
+    dimension: str = Field(primary_key=True)
+    value: str = Field(primary_key=True)
+    moderation_status: str = Field(primary_key=True)
+    count: int = Field(default=0)
+
+class PostViewCount(SQLModel, table=True):
+    """Сброшенные из буферов воркеров просмотры поста. Без внешнего ключа: очистка удаляет строки сама."""
+    post_id: uuid.UUID = Field(primary_key=True)
+    views: int = Field(default=0)
+
+class StoredFile(SQLModel, table=True):
+    """Объект в хранилище, адресуемый хэшем содержимого. ref_count = 0 — объект ждёт удаления."""
+    key: str = Field(primary_key=True)
+    ref_count: int = Field(default=0, index=True)
+    content_type: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.now)
+
 class PostImage(SQLModel, table=True):
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     post_id: Optional[uuid.UUID] = Field(foreign_key="post.id", nullable=False)
@@ -57,6 +76,9 @@ class Post(SQLModel, table=True):
     username: str = Field(index=True, nullable=False)
     moderation_status: ModerationStatus = Field(default=ModerationStatus.PENDING, index=True)
     rejection_reason: Optional[str] = Field(default=None)
+    deleted_at: Optional[datetime] = Field(default=None, index=True)
+    submitted_at: Optional[datetime] = Field(default_factory=datetime.now)
+    moderated_at: Optional[datetime] = Field(default=None)
     user: Optional["User"] = Relationship(back_populates="posts")
     search_vector: Optional[str] = Field(
         default=None,
@@ -82,4 +104,16 @@ class Post(SQLModel, table=True):
     images: List["PostImage"] = Relationship(
         back_populates="post",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"}
-    )
\ No newline at end of file
+    )
+    view_count: Optional["PostViewCount"] = Relationship(
+        sa_relationship_kwargs={
+            "primaryjoin": "Post.id == foreign(PostViewCount.post_id)",
+            "uselist": False,
+            "viewonly": True,
+            "lazy": "selectin",
+        }
+    )
+
+    @property
+    def views(self) -> int:
+        return self.view_count.views if self.view_count else 0
\ No newline at end of file
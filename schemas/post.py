@@ -26,6 +26,7 @@ class PostResponse(BaseModel):
     moderation_status: ModerationStatus
 
     rejection_reason: Optional[str] = None
+    views: int = 0
     images: List[PostImageResponse] = []
     
     class Config:
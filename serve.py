@@ -0,0 +1,57 @@
+"""
+Запуск в продакшене: python serve.py [--workers N] [--port 8000]
+
+Несколько процессов uvicorn (по умолчанию по числу доступных ядер), uvloop и httptools.
+По SIGTERM воркер сразу отвечает 503 на /health/ready, перестаёт принимать соединения
+и до GRACEFUL_SHUTDOWN_SECONDS ждёт текущие запросы вместе с их фоновыми задачами
+(например, отправкой писем), после чего останавливает планировщик и сбрасывает просмотры.
+"""
+import argparse
+import importlib.util
+import os
+
+import uvicorn
+
+from core.config import settings
+
+
+def default_workers() -> int:
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # sched_getaffinity нет на Windows и macOS
+        return os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск API в продакшене")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument("--keep-alive", type=int, default=settings.KEEP_ALIVE_SECONDS)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.GRACEFUL_SHUTDOWN_SECONDS)
+    args = parser.parse_args()
+
+    # uvloop не собирается под Windows, там остаётся стандартный asyncio
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()